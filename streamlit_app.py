@@ -1,8 +1,15 @@
+import io
+import json
+import math
+import threading
+from pathlib import Path
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import Circle, Rectangle, FancyBboxPatch
+from matplotlib.collections import EllipseCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 import pandas as pd
 from datetime import datetime
 
@@ -17,16 +24,112 @@ st.set_page_config(
 st.title("🏗️ Offshore Wind Foundation Layout Tool")
 st.markdown("*Interactive design tool for internal foundation component placement*")
 
+# Components are stored column-wise: one array per field for each component type.
+# Tendon and grout diameters are whole millimeters (int16) and shaft diameters are
+# meters (float32, only used for drawing). Coordinates stay float64: the clearance
+# checks compare against limits that positions on the 0.1 m grid hit exactly.
+DIAMETER_DTYPES = {'tendons': np.int16, 'grout_connections': np.int16, 'access_shafts': np.float32}
+# Divisor that turns a stored diameter into a radius in meters
+RADIUS_DIVISORS = {'tendons': 2000, 'grout_connections': 2000, 'access_shafts': 2}
+
+def empty_components(kind):
+    return {
+        'id': np.empty(0, dtype=np.int16),
+        'x': np.empty(0),
+        'y': np.empty(0),
+        'diameter': np.empty(0, dtype=DIAMETER_DTYPES[kind])
+    }
+
+def append_component(components, x, y, diameter):
+    row = {'id': component_count(components), 'x': x, 'y': y, 'diameter': diameter}
+    for field, value in row.items():
+        values = components[field]
+        # Cast first so appending never widens the stored dtype
+        components[field] = np.append(values, values.dtype.type(value))
+
+def component_count(components):
+    return len(components['id'])
+
+def component_radii(components, kind):
+    # float64 division, so radii equal the diameter/1000/2 the checks were written against
+    return components['diameter'] / RADIUS_DIVISORS[kind]
+
+def copy_components(components):
+    # Independent arrays for saving/loading, so layouts never share buffers
+    return {field: values.copy() for field, values in components.items()}
+
+# Saved layouts are kept in a JSON file next to the app so they survive restarts
+SAVED_LAYOUTS_PATH = Path(__file__).with_name('saved_layouts.json')
+
+@st.cache_resource
+def saved_layouts_lock():
+    return threading.Lock()
+
+# A truncated, empty or hand-edited file must not take the app down for every session
+SAVED_LAYOUTS_ERRORS = (OSError, ValueError, KeyError, TypeError, OverflowError)
+
+def read_saved_records():
+    if not SAVED_LAYOUTS_PATH.exists():
+        return []
+    records = json.loads(SAVED_LAYOUTS_PATH.read_text())
+    if not isinstance(records, list):
+        raise ValueError("expected a list of layouts")
+    return records
+
+@st.cache_data
+def load_saved_layouts():
+    # Parsed once per process; save_layout_record clears this after writing
+    try:
+        records = read_saved_records()
+    except SAVED_LAYOUTS_ERRORS as error:
+        st.warning(f"⚠️ Ignoring unreadable {SAVED_LAYOUTS_PATH.name}: {error}")
+        return []
+    layouts = []
+    for i, record in enumerate(records):
+        try:
+            layout = dict(record, name=str(record['name']), timestamp=str(record['timestamp']))
+            for kind in DIAMETER_DTYPES:
+                layout[kind] = {field: np.asarray(record[kind][field], dtype=empty.dtype)
+                                for field, empty in empty_components(kind).items()}
+                columns = layout[kind].values()
+                if any(values.ndim != 1 for values in columns) or len({len(values) for values in columns}) != 1:
+                    raise ValueError(f"{kind} fields must be flat lists of equal length")
+        except SAVED_LAYOUTS_ERRORS as error:
+            st.warning(f"⚠️ Skipping unreadable layout #{i} in {SAVED_LAYOUTS_PATH.name}: {error}")
+            continue
+        layouts.append(layout)
+    return layouts
+
+def save_layout_record(layout):
+    record = dict(layout)
+    for kind in DIAMETER_DTYPES:
+        record[kind] = {field: values.tolist() for field, values in layout[kind].items()}
+    with saved_layouts_lock():
+        try:
+            records = read_saved_records()
+        except SAVED_LAYOUTS_ERRORS as error:
+            st.warning(f"⚠️ Replacing unreadable {SAVED_LAYOUTS_PATH.name}: {error}")
+            records = []
+        records.append(record)
+        # Write then rename so a crash never leaves a half-written file behind
+        tmp_path = SAVED_LAYOUTS_PATH.with_suffix('.tmp')
+        try:
+            tmp_path.write_text(json.dumps(records))
+            tmp_path.replace(SAVED_LAYOUTS_PATH)
+        except OSError as error:
+            st.warning(f"⚠️ Layout kept for this session only, could not write {SAVED_LAYOUTS_PATH.name}: {error}")
+    load_saved_layouts.clear()
+
 # Initialize session state for storing layouts
+# (not setdefault for layouts: its default would be re-read on every rerun)
 if 'layouts' not in st.session_state:
-    st.session_state.layouts = []
-if 'current_layout' not in st.session_state:
-    st.session_state.current_layout = {
-        'name': 'Layout 1',
-        'tendons': [],
-        'grout_connections': [],
-        'access_shafts': []
-    }
+    st.session_state.layouts = load_saved_layouts()
+st.session_state.setdefault('current_layout', {
+    'name': 'Layout 1',
+    'tendons': empty_components('tendons'),
+    'grout_connections': empty_components('grout_connections'),
+    'access_shafts': empty_components('access_shafts')
+})
 
 # Sidebar - Component Library
 st.sidebar.header("📦 Component Library")
@@ -42,157 +145,205 @@ st.sidebar.subheader("Foundation Parameters")
 foundation_diameter = st.sidebar.slider("Foundation Diameter (m)", 5.0, 15.0, 10.0, 0.5)
 wall_thickness = st.sidebar.slider("Wall Thickness (m)", 0.3, 1.5, 0.8, 0.1)
 
+# Derived foundation geometry, computed once per run
+foundation_radius = foundation_diameter * 0.5
+inner_radius = foundation_radius - wall_thickness
+
 st.sidebar.markdown("---")
 
 # Component placement controls
+@st.cache_data
+def unit_circle_points(n):
+    # Evenly spaced points on the unit circle as a (2, n) array of x and y rows,
+    # scaled by the pattern radius at use time
+    angles = np.linspace(0, 2*np.pi, n, endpoint=False)
+    return np.vstack([np.cos(angles), np.sin(angles)])
+
 st.sidebar.subheader(f"Place {component_type}")
 
+# Placement inputs live in forms so dragging a slider doesn't rerun the app;
+# only the submit button does
 if component_type == "Prestressing Tendon":
     placement_mode = st.sidebar.radio("Placement Mode", ["Circular Pattern", "Manual"])
     
     if placement_mode == "Circular Pattern":
-        num_tendons = st.sidebar.number_input("Number of Tendons", 4, 24, 8, 1)
-        radius = st.sidebar.slider("Radius from Center (m)", 2.0, foundation_diameter/2 - 1.0, 4.0, 0.5)
-        tendon_diameter = st.sidebar.slider("Tendon Diameter (mm)", 100, 300, 150, 10)
+        with st.sidebar.form("place_tendon_pattern"):
+            num_tendons = st.number_input("Number of Tendons", 4, 24, 8, 1)
+            radius = st.slider("Radius from Center (m)", 2.0, foundation_radius - 1.0, 4.0, 0.5)
+            tendon_diameter = st.slider("Tendon Diameter (mm)", 100, 300, 150, 10)
+            submitted = st.form_submit_button("Generate Circular Pattern")
         
-        if st.sidebar.button("Generate Circular Pattern"):
-            st.session_state.current_layout['tendons'] = []
-            angles = np.linspace(0, 2*np.pi, num_tendons, endpoint=False)
-            for i, angle in enumerate(angles):
-                x = radius * np.cos(angle)
-                y = radius * np.sin(angle)
-                st.session_state.current_layout['tendons'].append({
-                    'id': i,
-                    'x': x,
-                    'y': y,
-                    'diameter': tendon_diameter,
-                    'type': 'vertical'
-                })
+        if submitted:
+            # One scaled (2, n) block; x and y are row views into it
+            xs, ys = radius * unit_circle_points(num_tendons)
+            st.session_state.current_layout['tendons'] = {
+                'id': np.arange(num_tendons, dtype=np.int16),
+                'x': xs,
+                'y': ys,
+                'diameter': np.full(num_tendons, tendon_diameter, dtype=np.int16)
+            }
             st.success(f"✓ Added {num_tendons} tendons in circular pattern")
     
     else:  # Manual placement
-        manual_x = st.sidebar.slider("X Position (m)", -foundation_diameter/2, foundation_diameter/2, 0.0, 0.1)
-        manual_y = st.sidebar.slider("Y Position (m)", -foundation_diameter/2, foundation_diameter/2, 0.0, 0.1)
-        tendon_diameter = st.sidebar.slider("Tendon Diameter (mm)", 100, 300, 150, 10)
+        with st.sidebar.form("place_tendon"):
+            manual_x = st.slider("X Position (m)", -foundation_radius, foundation_radius, 0.0, 0.1)
+            manual_y = st.slider("Y Position (m)", -foundation_radius, foundation_radius, 0.0, 0.1)
+            tendon_diameter = st.slider("Tendon Diameter (mm)", 100, 300, 150, 10)
+            submitted = st.form_submit_button("Add Tendon")
         
-        if st.sidebar.button("Add Tendon"):
-            st.session_state.current_layout['tendons'].append({
-                'id': len(st.session_state.current_layout['tendons']),
-                'x': manual_x,
-                'y': manual_y,
-                'diameter': tendon_diameter,
-                'type': 'vertical'
-            })
+        if submitted:
+            append_component(st.session_state.current_layout['tendons'],
+                             manual_x, manual_y, tendon_diameter)
             st.success("✓ Tendon added")
 
 elif component_type == "Grout Connection":
-    grout_x = st.sidebar.slider("X Position (m)", -foundation_diameter/2, foundation_diameter/2, 0.0, 0.1)
-    grout_y = st.sidebar.slider("Y Position (m)", -foundation_diameter/2, foundation_diameter/2, 2.0, 0.1)
-    grout_diameter = st.sidebar.slider("Connection Diameter (mm)", 200, 600, 400, 50)
+    with st.sidebar.form("place_grout"):
+        grout_x = st.slider("X Position (m)", -foundation_radius, foundation_radius, 0.0, 0.1)
+        grout_y = st.slider("Y Position (m)", -foundation_radius, foundation_radius, 2.0, 0.1)
+        grout_diameter = st.slider("Connection Diameter (mm)", 200, 600, 400, 50)
+        submitted = st.form_submit_button("Add Grout Connection")
     
-    if st.sidebar.button("Add Grout Connection"):
-        st.session_state.current_layout['grout_connections'].append({
-            'id': len(st.session_state.current_layout['grout_connections']),
-            'x': grout_x,
-            'y': grout_y,
-            'diameter': grout_diameter
-        })
+    if submitted:
+        append_component(st.session_state.current_layout['grout_connections'],
+                         grout_x, grout_y, grout_diameter)
         st.success("✓ Grout connection added")
 
 elif component_type == "Access Shaft":
-    shaft_x = st.sidebar.slider("X Position (m)", -foundation_diameter/2, foundation_diameter/2, 0.0, 0.1)
-    shaft_y = st.sidebar.slider("Y Position (m)", -foundation_diameter/2, foundation_diameter/2, -3.0, 0.1)
-    shaft_diameter = st.sidebar.slider("Shaft Diameter (m)", 0.8, 2.0, 1.2, 0.1)
+    with st.sidebar.form("place_shaft"):
+        shaft_x = st.slider("X Position (m)", -foundation_radius, foundation_radius, 0.0, 0.1)
+        shaft_y = st.slider("Y Position (m)", -foundation_radius, foundation_radius, -3.0, 0.1)
+        shaft_diameter = st.slider("Shaft Diameter (m)", 0.8, 2.0, 1.2, 0.1)
+        submitted = st.form_submit_button("Add Access Shaft")
     
-    if st.sidebar.button("Add Access Shaft"):
-        st.session_state.current_layout['access_shafts'].append({
-            'id': len(st.session_state.current_layout['access_shafts']),
-            'x': shaft_x,
-            'y': shaft_y,
-            'diameter': shaft_diameter
-        })
+    if submitted:
+        append_component(st.session_state.current_layout['access_shafts'],
+                         shaft_x, shaft_y, shaft_diameter)
         st.success("✓ Access shaft added")
 
 # Clear button
 st.sidebar.markdown("---")
 if st.sidebar.button("🗑️ Clear All Components"):
-    st.session_state.current_layout['tendons'] = []
-    st.session_state.current_layout['grout_connections'] = []
-    st.session_state.current_layout['access_shafts'] = []
-    st.rerun()
+    st.session_state.current_layout['tendons'] = empty_components('tendons')
+    st.session_state.current_layout['grout_connections'] = empty_components('grout_connections')
+    st.session_state.current_layout['access_shafts'] = empty_components('access_shafts')
 
 # Main area - Layout Visualization
-col1, col2 = st.columns([2, 1])
+# Fixed legend entries, built once instead of labelling and de-duplicating drawn
+# artists; every entry is always listed, even when that component type is absent
+LEGEND_HANDLES = [
+    Line2D([0], [0], color='#2C3E50', linewidth=3, label='Foundation Outer'),
+    Line2D([0], [0], color='#2C3E50', linewidth=2, linestyle='--', label='Foundation Inner'),
+    Line2D([0], [0], marker='o', color='w', markerfacecolor='#E74C3C', markeredgecolor='#C0392B',
+           markersize=12, label='Tendon'),
+    Line2D([0], [0], marker='o', color='w', markerfacecolor='#3498DB', markeredgecolor='#2980B9',
+           markersize=12, label='Grout'),
+    Line2D([0], [0], marker='o', color='w', markerfacecolor='#2ECC71', markeredgecolor='#27AE60',
+           markersize=12, label='Access Shaft'),
+    Line2D([0], [0], marker='o', color='k', linestyle='', markersize=8, label='Center'),
+]
 
-with col1:
-    st.subheader("Foundation Cross-Section")
-    
-    # Create the plot
-    fig, ax = plt.subplots(figsize=(12, 12))
-    ax.set_xlim(-foundation_diameter/2 - 1, foundation_diameter/2 + 1)
-    ax.set_ylim(-foundation_diameter/2 - 1, foundation_diameter/2 + 1)
+def draw_components(ax, components, radii, prefix, fontsize, facecolor, edgecolor, alpha):
+    # One EllipseCollection per component type instead of a Circle patch per item
+    if not component_count(components):
+        return
+    xs, ys = components['x'], components['y']
+    widths = radii * 2
+    ax.add_collection(EllipseCollection(widths, widths, 0, units='xy',
+                                        offsets=np.column_stack([xs, ys]),
+                                        offset_transform=ax.transData,
+                                        facecolors=facecolor, edgecolors=edgecolor,
+                                        alpha=alpha, linewidths=2))
+    for x, y, component_id in zip(xs, ys, components['id']):
+        ax.text(x, y, f"{prefix}{component_id}",
+               ha='center', va='center', fontsize=fontsize, color='white', weight='bold')
+
+@st.cache_resource
+def get_figure():
+    # One Figure shared by every rerun and session, redrawn in place; it is built
+    # outside pyplot so it never lands in pyplot's figure registry, and the lock
+    # keeps concurrent sessions from drawing into it at the same time
+    fig = Figure(figsize=(12, 12))
+    return fig, fig.add_subplot(), threading.Lock()
+
+def draw_cross_section(ax, tendons, grout_connections, access_shafts, foundation_radius, inner_radius):
+    plot_limit = foundation_radius + 1
+    ax.set_xlim(-plot_limit, plot_limit)
+    ax.set_ylim(-plot_limit, plot_limit)
     ax.set_aspect('equal')
     ax.grid(True, alpha=0.3)
     ax.set_xlabel('X (meters)', fontsize=12)
     ax.set_ylabel('Y (meters)', fontsize=12)
     
     # Draw foundation outer circle
-    outer_circle = Circle((0, 0), foundation_diameter/2, fill=False, 
-                          edgecolor='#2C3E50', linewidth=3, label='Foundation Outer')
+    outer_circle = Circle((0, 0), foundation_radius, fill=False, 
+                          edgecolor='#2C3E50', linewidth=3)
     ax.add_patch(outer_circle)
     
     # Draw foundation inner circle
-    inner_circle = Circle((0, 0), foundation_diameter/2 - wall_thickness, 
+    inner_circle = Circle((0, 0), inner_radius, 
                           fill=False, edgecolor='#2C3E50', linewidth=2, 
-                          linestyle='--', label='Foundation Inner')
+                          linestyle='--')
     ax.add_patch(inner_circle)
     
     # Draw tendons
-    for tendon in st.session_state.current_layout['tendons']:
-        tendon_circle = Circle((tendon['x'], tendon['y']), tendon['diameter']/1000/2,
-                              color='#E74C3C', alpha=0.7, edgecolor='#C0392B', linewidth=2,
-                              label='Tendon' if tendon['id'] == 0 else '')
-        ax.add_patch(tendon_circle)
-        ax.text(tendon['x'], tendon['y'], f"T{tendon['id']}", 
-               ha='center', va='center', fontsize=8, color='white', weight='bold')
+    draw_components(ax, tendons, component_radii(tendons, 'tendons'), 'T', 8,
+                    facecolor='#E74C3C', edgecolor='#C0392B', alpha=0.7)
     
     # Draw grout connections
-    for grout in st.session_state.current_layout['grout_connections']:
-        grout_circle = Circle((grout['x'], grout['y']), grout['diameter']/1000/2,
-                             color='#3498DB', alpha=0.6, edgecolor='#2980B9', linewidth=2,
-                             label='Grout' if grout['id'] == 0 else '')
-        ax.add_patch(grout_circle)
-        ax.text(grout['x'], grout['y'], f"G{grout['id']}", 
-               ha='center', va='center', fontsize=8, color='white', weight='bold')
+    draw_components(ax, grout_connections, component_radii(grout_connections, 'grout_connections'), 'G', 8,
+                    facecolor='#3498DB', edgecolor='#2980B9', alpha=0.6)
     
     # Draw access shafts
-    for shaft in st.session_state.current_layout['access_shafts']:
-        shaft_circle = Circle((shaft['x'], shaft['y']), shaft['diameter']/2,
-                             color='#2ECC71', alpha=0.5, edgecolor='#27AE60', linewidth=2,
-                             label='Access Shaft' if shaft['id'] == 0 else '')
-        ax.add_patch(shaft_circle)
-        ax.text(shaft['x'], shaft['y'], f"A{shaft['id']}", 
-               ha='center', va='center', fontsize=10, color='white', weight='bold')
+    draw_components(ax, access_shafts, component_radii(access_shafts, 'access_shafts'), 'A', 10,
+                    facecolor='#2ECC71', edgecolor='#27AE60', alpha=0.5)
     
     # Add center point
-    ax.plot(0, 0, 'ko', markersize=8, label='Center')
+    ax.plot(0, 0, 'ko', markersize=8)
     
     # Legend
-    handles, labels = ax.get_legend_handles_labels()
-    if handles:
-        # Remove duplicate labels
-        by_label = dict(zip(labels, handles))
-        ax.legend(by_label.values(), by_label.keys(), loc='upper right', fontsize=10)
+    ax.legend(handles=LEGEND_HANDLES, loc='upper right', fontsize=10)
+
+@st.cache_data(max_entries=32)
+def cross_section_svg(tendons, grout_connections, access_shafts, foundation_radius, inner_radius):
+    # Ship the plot as SVG so the browser rasterizes it instead of the server encoding a PNG
+    fig, ax, lock = get_figure()
+    buffer = io.StringIO()
+    with lock:
+        ax.clear()
+        draw_cross_section(ax, tendons, grout_connections, access_shafts, foundation_radius, inner_radius)
+        fig.savefig(buffer, format='svg', bbox_inches='tight')
+    return buffer.getvalue()
+
+def render_plot(foundation_radius, inner_radius):
+    st.subheader("Foundation Cross-Section")
     
-    st.pyplot(fig)
+    layout = st.session_state.current_layout
+    svg = cross_section_svg(
+        layout['tendons'],
+        layout['grout_connections'],
+        layout['access_shafts'],
+        foundation_radius,
+        inner_radius
+    )
+    st.image(svg)
 
-with col2:
+def grout_clearance_warnings(tendons, grouts):
+    # Every grout connection against every tendon in one broadcast; with at most
+    # a few dozen tendons this is cheaper than building a spatial index
+    dx = grouts['x'][:, None] - tendons['x']
+    dy = grouts['y'][:, None] - tendons['y']
+    grout_min_dists = (component_radii(grouts, 'grout_connections')[:, None]
+                       + component_radii(tendons, 'tendons') + 0.2)
+    return [f"Grout G{grouts['id'][g]} near Tendon T{tendons['id'][t]}"
+            for g, t in np.argwhere(dx*dx + dy*dy < grout_min_dists*grout_min_dists)]
+
+def render_analysis(foundation_radius, inner_radius):
     st.subheader("Engineering Analysis")
     
     # Component count
-    st.metric("Total Tendons", len(st.session_state.current_layout['tendons']))
-    st.metric("Grout Connections", len(st.session_state.current_layout['grout_connections']))
-    st.metric("Access Shafts", len(st.session_state.current_layout['access_shafts']))
+    st.metric("Total Tendons", component_count(st.session_state.current_layout['tendons']))
+    st.metric("Grout Connections", component_count(st.session_state.current_layout['grout_connections']))
+    st.metric("Access Shafts", component_count(st.session_state.current_layout['access_shafts']))
     
     st.markdown("---")
     st.subheader("Constraint Validation")
@@ -201,29 +352,38 @@ with col2:
     violations = []
     warnings = []
     
-    # Check 1: Components inside foundation
-    for tendon in st.session_state.current_layout['tendons']:
-        distance = np.sqrt(tendon['x']**2 + tendon['y']**2)
-        if distance + tendon['diameter']/1000/2 > foundation_diameter/2 - wall_thickness:
-            violations.append(f"Tendon T{tendon['id']} too close to wall")
-    
-    # Check 2: Minimum clearance between tendons
-    min_clearance = 0.3  # meters
     tendons = st.session_state.current_layout['tendons']
-    for i, t1 in enumerate(tendons):
-        for j, t2 in enumerate(tendons[i+1:], i+1):
-            dist = np.sqrt((t1['x']-t2['x'])**2 + (t1['y']-t2['y'])**2)
-            min_dist = (t1['diameter'] + t2['diameter'])/1000/2 + min_clearance
-            if dist < min_dist:
-                violations.append(f"Tendons T{i} and T{j} too close ({dist:.2f}m < {min_dist:.2f}m)")
+    grouts = st.session_state.current_layout['grout_connections']
     
-    # Check 3: Grout connection clearance
-    for grout in st.session_state.current_layout['grout_connections']:
-        for tendon in tendons:
-            dist = np.sqrt((grout['x']-tendon['x'])**2 + (grout['y']-tendon['y'])**2)
-            min_dist = grout['diameter']/1000/2 + tendon['diameter']/1000/2 + 0.2
-            if dist < min_dist:
-                warnings.append(f"Grout G{grout['id']} near Tendon T{tendon['id']}")
+    # Every check involves tendons, so an empty layout skips straight to the result
+    if component_count(tendons):
+        xs, ys = tendons['x'], tendons['y']
+        rs = component_radii(tendons, 'tendons')
+        
+        # Check 1: Components inside foundation
+        # (kept additive: moving the radius to the other side and squaring rounds
+        # differently for tendons sitting exactly at the wall)
+        too_close_to_wall = np.sqrt(xs*xs + ys*ys) + rs > inner_radius
+        for tendon_id in tendons['id'][too_close_to_wall]:
+            violations.append(f"Tendon T{tendon_id} too close to wall")
+        
+        # Check 2: Minimum clearance between tendons
+        # (compared squared; sqrt is only taken for reported violations)
+        min_clearance = 0.3  # meters
+        dx = xs[:, None] - xs
+        dy = ys[:, None] - ys
+        dists_sq = dx*dx + dy*dy
+        # Summed diameters rather than rs[:, None] + rs: adding two rounded radii can
+        # land one ulp off the limit and flag pairs sitting exactly at the clearance
+        ds = tendons['diameter'].astype(np.float64)
+        min_dists = (ds[:, None] + ds) / RADIUS_DIVISORS['tendons'] + min_clearance
+        for i, j in np.argwhere(np.triu(dists_sq < min_dists*min_dists, k=1)):
+            dist = math.sqrt(dists_sq[i, j])
+            violations.append(f"Tendons T{i} and T{j} too close ({dist:.2f}m < {min_dists[i, j]:.2f}m)")
+        
+        # Check 3: Grout connection clearance
+        if component_count(grouts):
+            warnings.extend(grout_clearance_warnings(tendons, grouts))
     
     # Display validation results
     if len(violations) == 0 and len(warnings) == 0:
@@ -242,7 +402,7 @@ with col2:
     st.subheader("Estimates")
     
     # Simple cost estimation
-    tendon_count = len(tendons)
+    tendon_count = component_count(tendons)
     steel_per_tendon = 150  # kg
     total_steel = tendon_count * steel_per_tendon
     steel_cost_per_kg = 3.50  # USD
@@ -251,65 +411,85 @@ with col2:
     st.metric("Steel Cost", f"${total_steel * steel_cost_per_kg:,.0f}")
     
     # Construction complexity score (1-10)
-    complexity = min(10, 2 + tendon_count * 0.3 + len(st.session_state.current_layout['grout_connections']) * 0.5)
+    complexity = min(10, 2 + tendon_count * 0.3 + component_count(grouts) * 0.5)
     st.metric("Complexity Score", f"{complexity:.1f}/10")
 
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    render_plot(foundation_radius, inner_radius)
+
+with col2:
+    render_analysis(foundation_radius, inner_radius)
+
 # Bottom section - Layout management
-st.markdown("---")
-st.subheader("Layout Management")
-
-col_a, col_b, col_c = st.columns(3)
-
-with col_a:
-    layout_name = st.text_input("Layout Name", value=st.session_state.current_layout['name'])
-    st.session_state.current_layout['name'] = layout_name
-
-with col_b:
-    if st.button("💾 Save Layout"):
-        layout_copy = {
-            'name': layout_name,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M"),
-            'tendons': st.session_state.current_layout['tendons'].copy(),
-            'grout_connections': st.session_state.current_layout['grout_connections'].copy(),
-            'access_shafts': st.session_state.current_layout['access_shafts'].copy(),
-            'foundation_diameter': foundation_diameter,
-            'wall_thickness': wall_thickness
-        }
-        st.session_state.layouts.append(layout_copy)
-        st.success(f"✓ Layout '{layout_name}' saved!")
-
-with col_c:
-    # Export to CSV
-    if len(st.session_state.current_layout['tendons']) > 0:
-        df_tendons = pd.DataFrame(st.session_state.current_layout['tendons'])
-        csv = df_tendons.to_csv(index=False)
-        st.download_button(
-            label="📥 Export Tendons CSV",
-            data=csv,
-            file_name=f"{layout_name}_tendons.csv",
-            mime="text/csv"
-        )
-
-# Show saved layouts
-if len(st.session_state.layouts) > 0:
+@st.cache_data
+def tendons_to_csv(tendons):
+    # Only re-serialized when the tendon arrays change, not on every rerun
+    return pd.DataFrame(tendons).assign(type='vertical').to_csv(index=False).encode()
+
+# Name edits, saves, exports and the saved-layout list don't affect the plot or
+# analysis, so this section reruns on its own as a fragment
+@st.fragment
+def render_layout_management(foundation_diameter, wall_thickness):
     st.markdown("---")
-    st.subheader("Saved Layouts")
+    st.subheader("Layout Management")
+
+    col_a, col_b, col_c = st.columns(3)
+
+    with col_a:
+        layout_name = st.text_input("Layout Name", value=st.session_state.current_layout['name'])
+        st.session_state.current_layout['name'] = layout_name
+
+    with col_b:
+        if st.button("💾 Save Layout"):
+            layout_copy = {
+                'name': layout_name,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M"),
+                'tendons': copy_components(st.session_state.current_layout['tendons']),
+                'grout_connections': copy_components(st.session_state.current_layout['grout_connections']),
+                'access_shafts': copy_components(st.session_state.current_layout['access_shafts']),
+                'foundation_diameter': foundation_diameter,
+                'wall_thickness': wall_thickness
+            }
+            st.session_state.layouts.append(layout_copy)
+            save_layout_record(layout_copy)
+            st.success(f"✓ Layout '{layout_name}' saved!")
+
+    with col_c:
+        # Export to CSV
+        if component_count(st.session_state.current_layout['tendons']) > 0:
+            csv = tendons_to_csv(st.session_state.current_layout['tendons'])
+            st.download_button(
+                label="📥 Export Tendons CSV",
+                data=csv,
+                file_name=f"{layout_name}_tendons.csv",
+                mime="text/csv"
+            )
+
+    # Show saved layouts
+    if len(st.session_state.layouts) > 0:
+        st.markdown("---")
+        st.subheader("Saved Layouts")
     
-    for i, layout in enumerate(st.session_state.layouts):
-        with st.expander(f"{layout['name']} - {layout['timestamp']}"):
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Tendons", len(layout['tendons']))
-            col2.metric("Grout Connections", len(layout['grout_connections']))
-            col3.metric("Access Shafts", len(layout['access_shafts']))
+        for i, layout in enumerate(st.session_state.layouts):
+            with st.expander(f"{layout['name']} - {layout['timestamp']}"):
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Tendons", component_count(layout['tendons']))
+                col2.metric("Grout Connections", component_count(layout['grout_connections']))
+                col3.metric("Access Shafts", component_count(layout['access_shafts']))
             
-            if st.button(f"Load Layout {i}", key=f"load_{i}"):
-                st.session_state.current_layout = {
-                    'name': layout['name'] + " (copy)",
-                    'tendons': layout['tendons'].copy(),
-                    'grout_connections': layout['grout_connections'].copy(),
-                    'access_shafts': layout['access_shafts'].copy()
-                }
-                st.rerun()
+                if st.button(f"Load Layout {i}", key=f"load_{i}"):
+                    st.session_state.current_layout = {
+                        'name': layout['name'] + " (copy)",
+                        'tendons': copy_components(layout['tendons']),
+                        'grout_connections': copy_components(layout['grout_connections']),
+                        'access_shafts': copy_components(layout['access_shafts'])
+                    }
+                    # The plot and analysis sit outside this fragment, so rerun the whole app
+                    st.rerun(scope="app")
+
+render_layout_management(foundation_diameter, wall_thickness)
 
 # Footer
 st.markdown("---")